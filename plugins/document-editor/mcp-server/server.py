@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # /// script
-# dependencies = ["mcp>=1.0.0"]
+# dependencies = ["mcp>=1.0.0", "orjson>=3.9", "mistune>=3.0"]
 # ///
 """
 Interactive Document Editor MCP Server
@@ -11,70 +11,197 @@ Provides two tools:
 """
 
 import asyncio
+import functools
+import gzip
+import hashlib
 import json
 import os
+import secrets
 import signal
-import socket
 import sys
-import tempfile
 import threading
-import uuid
 import webbrowser
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from pathlib import Path
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
-from web_ui import parse_markdown_paragraphs, generate_comment_html, generate_review_html
+from web_ui import (
+    STATIC_ASSETS,
+    Paragraph,
+    parse_markdown_paragraphs,
+    generate_comment_html_bytes,
+    generate_review_html_bytes,
+)
+
+
+# JSON for the submit/result path: orjson when available (parses bytes directly),
+# stdlib otherwise. Both produce the same indented, non-ASCII-preserving output.
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+else:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+# Largest submit body accepted; results are parsed from a single in-memory read
+_MAX_BODY = 64 * 1024 * 1024
+
+# One HTTP server for the lifetime of the MCP server; each tool call is served
+# under its own /<session_id>/ path.
+_server: ThreadingHTTPServer | None = None
+
+# In-flight UI sessions: session_id -> (page bytes, gzipped page bytes) /
+# future resolved by submit
+_pages: dict[str, tuple[bytes, bytes]] = {}
+_pending: dict[str, asyncio.Future] = {}
+
+# Parsed paragraphs + comment page (raw and gzipped), keyed by (content
+# digest, title). LRU-bounded so repeated collect_comments calls on the
+# documents being edited skip the markdown parse, HTML build and compression.
+_PARAGRAPH_CACHE_SIZE = 64
+_paragraph_cache: OrderedDict[tuple[bytes, str], tuple[list[Paragraph], tuple[bytes, bytes]]] = OrderedDict()
+
+
+def _paragraph_cache_clear() -> None:
+    """Drop all cached comment pages."""
+    _paragraph_cache.clear()
+
 
+def _page_entry(page: bytes, compresslevel: int = 1) -> tuple[bytes, bytes]:
+    """Pair an encoded page with its gzipped copy, as stored in _pages."""
+    return page, gzip.compress(page, compresslevel=compresslevel)
 
-# Global state for the HTTP server
-_result: dict | None = None
-_result_event = threading.Event()
 
+# Shared stylesheets/scripts from web_ui, compressed once at startup:
+# name -> (content type, body, gzipped body)
+_static: dict[str, tuple[str, bytes, bytes]] = {
+    name: (content_type, *_page_entry(body, 9))
+    for name, (content_type, body) in STATIC_ASSETS.items()
+}
 
-def find_free_port() -> int:
-    """Find a free port on localhost."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(('', 0))
-        s.listen(1)
-        return s.getsockname()[1]
 
+def _comment_page(content: str, title: str) -> tuple[list[Paragraph], tuple[bytes, bytes]]:
+    """Return (paragraphs, (page, gzipped page)) for a document, cached by content digest."""
+    key = (hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest(), title)
+    cached = _paragraph_cache.get(key)
+    if cached is not None:
+        _paragraph_cache.move_to_end(key)
+        return cached
 
-class EditorHTTPHandler(SimpleHTTPRequestHandler):
+    paragraphs = parse_markdown_paragraphs(content)
+    # Cached pages are compressed once and may be served many times, so a
+    # higher level than the per-call review page is worth it
+    page = _page_entry(generate_comment_html_bytes(title, paragraphs), 6) if paragraphs else (b"", b"")
+    cached = (paragraphs, page)
+    _paragraph_cache[key] = cached
+    if len(_paragraph_cache) > _PARAGRAPH_CACHE_SIZE:
+        _paragraph_cache.popitem(last=False)
+    return cached
+
+
+class EditorHTTPHandler(BaseHTTPRequestHandler):
     """HTTP handler for serving the editor UI and receiving results."""
 
-    def __init__(self, *args, serve_dir: str, **kwargs):
-        self.serve_dir = serve_dir
-        super().__init__(*args, directory=serve_dir, **kwargs)
+    # Keep-alive lets the page GET and the submit POST share one connection.
+    # Every response therefore carries Content-Length, and idle connections
+    # are dropped after `timeout` seconds.
+    protocol_version = 'HTTP/1.1'
+    timeout = 5
+
+    def do_GET(self):
+        """Serve a session's page or a static asset straight from memory."""
+        session_id, _, name = self.path.strip('/').partition('/')
+
+        if session_id == 'static' and name in _static:
+            content_type, body, body_gz = _static[name]
+            # Asset names carry a digest of their content
+            self._send_content(content_type, body, body_gz, 'public, max-age=31536000, immutable')
+            return
+
+        pages = _pages.get(session_id)
+        if pages is not None and name in ('', 'index.html'):
+            self._send_content('text/html; charset=utf-8', *pages, 'no-store')
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def _send_content(self, content_type: str, body: bytes, body_gz: bytes, cache_control: str):
+        """Send a 200 response, using the gzipped body if the client accepts it."""
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = body_gz
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', cache_control)
+        # The body depends on Accept-Encoding, so caches must key on it
+        self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
 
     def do_POST(self):
-        """Handle POST request for submitting results."""
-        global _result
+        """Handle POST /<session_id>/submit and resolve that session's future."""
+        session_id, _, action = self.path.strip('/').partition('/')
+        future = _pending.get(session_id)
+
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+
+        if action == 'submit' and future is not None:
+            if not 0 <= content_length <= _MAX_BODY:
+                # Reject before reading so a bad or oversized body is never
+                # buffered; it stays unread, so the connection is closed
+                self.close_connection = True
+                self.send_response(400 if content_length < 0 else 413)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
 
-        if self.path == '/submit':
-            content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
 
             try:
-                _result = json.loads(post_data.decode('utf-8'))
-                _result_event.set()
+                result = _loads(post_data)
+                future.get_loop().call_soon_threadsafe(_resolve, future, result)
 
+                body = b'{"status": "ok"}'
                 self.send_response(200)
                 self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
-                self.wfile.write(b'{"status": "ok"}')
+                self.wfile.write(body)
             except Exception as e:
+                body = json.dumps({"error": str(e)}).encode()
                 self.send_response(500)
                 self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
                 self.end_headers()
-                self.wfile.write(json.dumps({"error": str(e)}).encode())
+                self.wfile.write(body)
         else:
+            # The body is not read here (e.g. a repeated submit after the
+            # session ended), so it must not be parsed as the next request
+            self.close_connection = True
             self.send_response(404)
+            self.send_header('Content-Length', '0')
             self.end_headers()
 
     def do_OPTIONS(self):
@@ -83,6 +210,7 @@ class EditorHTTPHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def log_message(self, format, *args):
@@ -90,75 +218,70 @@ class EditorHTTPHandler(SimpleHTTPRequestHandler):
         pass
 
 
-def make_handler(serve_dir: str):
-    """Factory to create handler with serve_dir bound."""
-    def handler(*args, **kwargs):
-        return EditorHTTPHandler(*args, serve_dir=serve_dir, **kwargs)
-    return handler
-
+def _resolve(future: asyncio.Future, result: Any) -> None:
+    """Set a session's result on the event loop, ignoring late or repeated submits."""
+    if not future.done():
+        future.set_result(result)
 
-async def _serve_and_wait(html_content: str, timeout: int = 7200) -> dict[str, Any]:
-    """
-    Common pattern: write HTML to temp dir, serve via HTTP, open browser, wait for submit.
-    Returns the submitted result or error/timeout dict.
-    """
-    global _result, _result_event
-
-    # Reset state
-    _result = None
-    _result_event.clear()
 
-    # Create temp directory
-    session_id = str(uuid.uuid4())[:8]
-    serve_dir = Path(tempfile.gettempdir()) / f"claude-doc-editor-{session_id}"
-    serve_dir.mkdir(parents=True, exist_ok=True)
+def _get_server() -> ThreadingHTTPServer:
+    """Start the shared HTTP server on first use and return it.
 
-    try:
-        # Find a free port
-        port = find_free_port()
-
-        # Write HTML
-        html_path = serve_dir / "index.html"
-        html_path.write_text(html_content, encoding='utf-8')
+    Binds port 0 so the OS assigns a free port atomically; the chosen port is
+    read back from server_address. Each connection gets its own thread
+    (ThreadingHTTPServer makes them daemon threads), so a kept-alive or slow
+    request never blocks another session.
+    """
+    global _server
 
-        # Start HTTP server in a thread
-        server = HTTPServer(('localhost', port), make_handler(str(serve_dir)))
-        server_thread = threading.Thread(target=server.serve_forever)
+    if _server is None:
+        _server = ThreadingHTTPServer(('localhost', 0), EditorHTTPHandler)
+        server_thread = threading.Thread(target=_server.serve_forever)
         server_thread.daemon = True
         server_thread.start()
+    return _server
 
-        # Open browser
-        url = f"http://localhost:{port}/index.html"
-        webbrowser.open(url)
 
-        # Wait for result
-        result_received = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: _result_event.wait(timeout)
-        )
+async def _serve_and_wait(page: tuple[bytes, bytes], timeout: int = 7200) -> dict[str, Any]:
+    """
+    Common pattern: serve a page (see _page_entry) from memory via HTTP, open browser, wait for submit.
+    Returns the submitted result or error/timeout dict.
+    """
+    server = _get_server()
+    port = server.server_address[1]
+
+    loop = asyncio.get_running_loop()
+    session_id = secrets.token_hex(4)
+    future = loop.create_future()
+    _pages[session_id] = page
+    _pending[session_id] = future
 
-        # Shutdown server
-        server.shutdown()
+    try:
+        # Open browser off the event loop; webbrowser.open can block while the
+        # OS locates the default browser, and the server is already listening
+        url = f"http://localhost:{port}/{session_id}/index.html"
+        loop.run_in_executor(None, webbrowser.open, url)
 
-        if not result_received:
+        # Wait for result
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
             return {
                 "status": "timeout",
                 "message": f"Timed out after {timeout // 60} minutes"
             }
 
-        if _result is None:
+        if result is None:
             return {
                 "status": "error",
                 "message": "No result received"
             }
 
-        return _result
+        return result
 
     finally:
-        try:
-            import shutil
-            shutil.rmtree(serve_dir, ignore_errors=True)
-        except Exception:
-            pass
+        _pages.pop(session_id, None)
+        _pending.pop(session_id, None)
 
 
 async def collect_comments_impl(content: str, title: str = "Document") -> dict[str, Any]:
@@ -172,7 +295,7 @@ async def collect_comments_impl(content: str, title: str = "Document") -> dict[s
     Returns:
         Dict with status and comments list
     """
-    paragraphs = parse_markdown_paragraphs(content)
+    paragraphs, page = _comment_page(content, title)
 
     if not paragraphs:
         return {
@@ -180,54 +303,31 @@ async def collect_comments_impl(content: str, title: str = "Document") -> dict[s
             "message": "No paragraphs found in the content"
         }
 
-    # We need a port for the HTML, but _serve_and_wait finds it internally.
-    # So we generate HTML with a placeholder and replace, or we refactor.
-    # Let's refactor: generate HTML needs port, so we do it inline.
-
-    global _result, _result_event
-    _result = None
-    _result_event.clear()
-
-    session_id = str(uuid.uuid4())[:8]
-    serve_dir = Path(tempfile.gettempdir()) / f"claude-doc-editor-{session_id}"
-    serve_dir.mkdir(parents=True, exist_ok=True)
-
-    try:
-        port = find_free_port()
-        html_content = generate_comment_html(title, content, paragraphs, port)
-
-        html_path = serve_dir / "index.html"
-        html_path.write_text(html_content, encoding='utf-8')
-
-        server = HTTPServer(('localhost', port), make_handler(str(serve_dir)))
-        server_thread = threading.Thread(target=server.serve_forever)
-        server_thread.daemon = True
-        server_thread.start()
-
-        url = f"http://localhost:{port}/index.html"
-        webbrowser.open(url)
+    return await _serve_and_wait(page)
 
-        timeout = 7200
-        result_received = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: _result_event.wait(timeout)
-        )
 
-        server.shutdown()
-
-        if not result_received:
-            return {"status": "timeout", "message": "Timed out after 2 hours"}
-
-        if _result is None:
-            return {"status": "error", "message": "No result received"}
-
-        return _result
+def _expand_decisions(changes: list[dict], decisions: list[dict]) -> list[dict]:
+    """
+    Rebuild full decision records from the page's trimmed ones.
 
-    finally:
-        try:
-            import shutil
-            shutil.rmtree(serve_dir, ignore_errors=True)
-        except Exception:
-            pass
+    The review page posts only paragraph_index and accepted for each change,
+    in the order the changes were given; original and suggested are taken
+    from the changes themselves rather than sent back over the wire.
+    Entries that are not objects are skipped; positions still pair each
+    remaining decision with its own change.
+    """
+    if not isinstance(decisions, list):
+        return []
+    return [
+        {
+            "paragraph_index": change.get("paragraph_index"),
+            "original": change.get("original"),
+            "suggested": change.get("suggested"),
+            "accepted": bool(decision.get("accepted")),
+        }
+        for change, decision in zip(changes, decisions)
+        if isinstance(decision, dict)
+    ]
 
 
 async def review_changes_impl(changes: list[dict]) -> dict[str, Any]:
@@ -246,63 +346,27 @@ async def review_changes_impl(changes: list[dict]) -> dict[str, Any]:
             "message": "No changes provided"
         }
 
-    global _result, _result_event
-    _result = None
-    _result_event.clear()
-
-    session_id = str(uuid.uuid4())[:8]
-    serve_dir = Path(tempfile.gettempdir()) / f"claude-doc-editor-{session_id}"
-    serve_dir.mkdir(parents=True, exist_ok=True)
-
-    try:
-        port = find_free_port()
-        html_content = generate_review_html("Review Changes", changes, port)
-
-        html_path = serve_dir / "index.html"
-        html_path.write_text(html_content, encoding='utf-8')
-
-        server = HTTPServer(('localhost', port), make_handler(str(serve_dir)))
-        server_thread = threading.Thread(target=server.serve_forever)
-        server_thread.daemon = True
-        server_thread.start()
-
-        url = f"http://localhost:{port}/index.html"
-        webbrowser.open(url)
-
-        timeout = 7200
-        result_received = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: _result_event.wait(timeout)
-        )
-
-        server.shutdown()
-
-        if not result_received:
-            return {"status": "timeout", "message": "Timed out after 2 hours"}
-
-        if _result is None:
-            return {"status": "error", "message": "No result received"}
-
-        return _result
-
-    finally:
-        try:
-            import shutil
-            shutil.rmtree(serve_dir, ignore_errors=True)
-        except Exception:
-            pass
+    result = await _serve_and_wait(_page_entry(generate_review_html_bytes("Review Changes", changes)))
+    # The result is whatever JSON the page posted; don't trust its shape
+    if not isinstance(result, dict):
+        return {
+            "status": "error",
+            "message": "Malformed review result"
+        }
+    if result.get("status") == "submitted":
+        result["decisions"] = _expand_decisions(changes, result.get("decisions") or [])
+    return result
 
 
 # Create MCP server
 app = Server("interactive-document-editor")
 
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available tools."""
-    return [
-        Tool(
-            name="collect_comments",
-            description="""Open an interactive web UI to collect paragraph-level editing instructions on a markdown document.
+# Tool definitions never change, so build them once instead of per list_tools RPC
+_TOOLS_LIST: list[Tool] = [
+    Tool(
+        name="collect_comments",
+        description="""Open an interactive web UI to collect paragraph-level editing instructions on a markdown document.
 
 The user can:
 - Click on any paragraph to select it
@@ -310,25 +374,25 @@ The user can:
 - Submit all comments at once
 
 Returns a list of comments with paragraph index, original text, and user instruction.""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "content": {
-                        "type": "string",
-                        "description": "Markdown content to display for commenting"
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "Document title",
-                        "default": "Document"
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "content": {
+                    "type": "string",
+                    "description": "Markdown content to display for commenting"
                 },
-                "required": ["content"]
-            }
-        ),
-        Tool(
-            name="review_changes",
-            description="""Open an interactive web UI to review proposed changes (original vs suggested) with Accept/Reject for each.
+                "title": {
+                    "type": "string",
+                    "description": "Document title",
+                    "default": "Document"
+                }
+            },
+            "required": ["content"]
+        }
+    ),
+    Tool(
+        name="review_changes",
+        description="""Open an interactive web UI to review proposed changes (original vs suggested) with Accept/Reject for each.
 
 The user can:
 - See a diff view of each proposed change (original in red, suggested in green)
@@ -337,40 +401,46 @@ The user can:
 - Submit final decisions
 
 Returns a list of decisions with accepted/rejected status for each change.""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "changes": {
-                        "type": "array",
-                        "description": "List of proposed changes to review",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "paragraph_index": {
-                                    "type": "integer",
-                                    "description": "Index of the paragraph in the document"
-                                },
-                                "original": {
-                                    "type": "string",
-                                    "description": "Original paragraph text"
-                                },
-                                "suggested": {
-                                    "type": "string",
-                                    "description": "AI-suggested replacement text"
-                                },
-                                "instruction": {
-                                    "type": "string",
-                                    "description": "The user's original editing instruction"
-                                }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "changes": {
+                    "type": "array",
+                    "description": "List of proposed changes to review",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "paragraph_index": {
+                                "type": "integer",
+                                "description": "Index of the paragraph in the document"
                             },
-                            "required": ["paragraph_index", "original", "suggested", "instruction"]
-                        }
+                            "original": {
+                                "type": "string",
+                                "description": "Original paragraph text"
+                            },
+                            "suggested": {
+                                "type": "string",
+                                "description": "AI-suggested replacement text"
+                            },
+                            "instruction": {
+                                "type": "string",
+                                "description": "The user's original editing instruction"
+                            }
+                        },
+                        "required": ["paragraph_index", "original", "suggested", "instruction"]
                     }
-                },
-                "required": ["changes"]
-            }
-        )
-    ]
+                }
+            },
+            "required": ["changes"]
+        }
+    )
+]
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available tools."""
+    return _TOOLS_LIST
 
 
 @app.call_tool()
@@ -382,7 +452,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         result = await collect_comments_impl(content, title)
         return [TextContent(
             type="text",
-            text=json.dumps(result, indent=2, ensure_ascii=False)
+            text=_dumps(result)
         )]
 
     elif name == "review_changes":
@@ -390,23 +460,34 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         result = await review_changes_impl(changes)
         return [TextContent(
             type="text",
-            text=json.dumps(result, indent=2, ensure_ascii=False)
+            text=_dumps(result)
         )]
 
     return [TextContent(
         type="text",
-        text=json.dumps({"error": f"Unknown tool: {name}"})
+        text=_unknown_tool_error(name)
     )]
 
 
+@functools.lru_cache(maxsize=32)
+def _unknown_tool_error(name: str) -> str:
+    """Error JSON for an unknown tool name, memoized for repeated probes.
+
+    Only the immutable text is cached; callers get a fresh response list.
+    """
+    return json.dumps({"error": f"Unknown tool: {name}"})
+
+
 def setup_signal_handlers():
     """Set up signal handlers for graceful shutdown."""
     def handle_shutdown(signum, frame):
         sys.exit(0)
 
-    signal.signal(signal.SIGTERM, handle_shutdown)
-    signal.signal(signal.SIGHUP, handle_shutdown)
-    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    # SIGHUP and SIGPIPE do not exist on Windows
+    for sig_name in ('SIGTERM', 'SIGHUP', 'SIGPIPE'):
+        sig = getattr(signal, sig_name, None)
+        if sig is not None:
+            signal.signal(sig, signal.SIG_DFL if sig_name == 'SIGPIPE' else handle_shutdown)
 
 
 async def main():
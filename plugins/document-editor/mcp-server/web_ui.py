@@ -1,16 +1,30 @@
 """
 Web UI Generator for Interactive Document Editor
 
-Generates two types of self-contained HTML files:
+Generates two types of HTML pages:
 1. Comment collection UI - users click paragraphs and enter editing instructions
 2. Review UI - users Accept/Reject AI-suggested changes with diff view
+
+The pages are not self-contained: each links its stylesheet and script from
+/static/<name> (see STATIC_ASSETS), so they render only when served by the
+editor's HTTP server.
 """
 
+import functools
+import hashlib
 import json
 import re
-from typing import List, Dict, Any
+from html import escape
+from typing import Any, Dict, Iterator, List
 from dataclasses import dataclass
 
+import mistune
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 @dataclass
 class Paragraph:
@@ -19,153 +33,288 @@ class Paragraph:
     text: str       # plain text content
     raw: str        # original markdown
     block_type: str # heading, paragraph, list, code, blockquote, hr
+    html: str = ''  # rendered block HTML for the comment page
 
 
-def parse_markdown_paragraphs(content: str) -> List[Paragraph]:
-    """
-    Parse markdown content into paragraph-level blocks.
-    Groups consecutive lines into logical blocks separated by blank lines.
+# Block-level line classification, dispatched on the first non-space character
+# of the line. Each classifier gets the line and the offset of that character
+# and returns the block kind, or None for a plain paragraph line. Trailing
+# whitespace is only stripped for the rare candidates that need it, so the
+# common text line is classified without allocating.
+
+def _classify_hash(line: str, start: int) -> str | None:
+    """Heading: 1-6 '#' followed by whitespace and some text."""
+    n = start + 1
+    while n < len(line) and line[n] == '#':
+        n += 1
+    if n - start <= 6 and line[n:n + 1].isspace() and not line[n:].isspace():
+        return "heading"
+    return None
+
+
+_HR_CHARS = frozenset('-*_')
+_LIST_MARKERS = frozenset('-*+')
+
+
+def _classify_rule_or_bullet(line: str, start: int) -> str | None:
+    """Horizontal rule (3+ of the same '-', '*' or '_') or bullet list item."""
+    first = line[start]
+    if first in _HR_CHARS:
+        body = line[start:].rstrip()
+        if len(body) >= 3 and body.count(first) == len(body):
+            return "hr"
+    if first in _LIST_MARKERS and line[start + 1:start + 2].isspace():
+        return "list"
+    return None
+
+
+def _classify_ordered(line: str, start: int) -> str | None:
+    """Ordered list item: digits, '.', whitespace."""
+    n = start + 1
+    while n < len(line) and line[n].isdecimal():
+        n += 1
+    if line[n:n + 1] == '.' and line[n + 1:n + 2].isspace():
+        return "list"
+    return None
+
+
+def _classify_blockquote(line: str, start: int) -> str | None:
+    return "blockquote"
+
+
+# Markdown markers removed from heading / blockquote text in flush()
+_HEADING_STRIP = re.compile(r'^#+\s*')
+_BLOCKQUOTE_STRIP = re.compile(r'^>\s?', re.MULTILINE)
+
+_CLASSIFIERS = {
+    '#': _classify_hash,
+    '-': _classify_rule_or_bullet,
+    '*': _classify_rule_or_bullet,
+    '_': _classify_rule_or_bullet,
+    '+': _classify_rule_or_bullet,
+    '>': _classify_blockquote,
+}
+
+
+# Block renderer for the comment page. Raw HTML in the document is escaped
+# rather than passed through, so it shows up as text instead of markup.
+_md = mistune.create_markdown(escape=True, plugins=['strikethrough', 'table', 'url'])
+
+
+@functools.lru_cache(maxsize=4096)
+def _render_block(block_type: str, raw: str, text: str) -> str:
+    """Render one block to HTML. Unchanged blocks hit the cache across calls."""
+    if block_type == "code":
+        return '<pre><code>' + escape(text) + '</code></pre>'
+    if block_type == "hr":
+        return '<hr>'
+    return _md(raw)
+
+
+class _MDParser:
+    """Block-grouping state for parse_markdown_paragraphs.
+
+    Kept on a slotted instance rather than in closure cells, so flush()
+    reads plain attributes and feed() runs its line loop on locals.
     """
-    paragraphs = []
-    lines = content.split('\n')
-    current_block: list[str] = []
-    current_type = "paragraph"
-    in_code_block = False
-    idx = 0
-
-    def flush():
-        nonlocal current_block, current_type, idx
-        if not current_block:
+    __slots__ = ('block', 'type', 'idx', 'paras', 'in_code')
+
+    def __init__(self, line_count: int):
+        self.block: list[str] = []
+        self.type = "paragraph"
+        self.idx = 0
+        self.in_code = False
+        # Every block holds at least one line, so the line count bounds the
+        # block count; fill a presized list by index and trim it at the end
+        self.paras: list[Paragraph | None] = [None] * line_count
+
+    def flush(self) -> None:
+        block = self.block
+        if not block:
             return
-        raw = '\n'.join(current_block)
+        block_type = self.type
+        raw = '\n'.join(block)
         text = raw
         # Strip markdown formatting for plain text
-        if current_type == "heading":
-            text = re.sub(r'^#+\s*', '', text)
-        elif current_type == "code":
+        if block_type == "heading":
+            text = _HEADING_STRIP.sub('', text)
+        elif block_type == "code":
             # Remove fence lines
-            code_lines = current_block[:]
-            if code_lines and code_lines[0].startswith('```'):
-                code_lines = code_lines[1:]
-            if code_lines and code_lines[-1].startswith('```'):
-                code_lines = code_lines[:-1]
-            text = '\n'.join(code_lines)
-        elif current_type == "blockquote":
-            text = re.sub(r'^>\s?', '', text, flags=re.MULTILINE)
-
-        paragraphs.append(Paragraph(
+            start = 1 if block[0].startswith('```') else 0
+            end = -1 if len(block) > start and block[-1].startswith('```') else None
+            text = '\n'.join(block[start:end])
+        elif block_type == "blockquote":
+            text = _BLOCKQUOTE_STRIP.sub('', text)
+
+        text = text.strip()
+        idx = self.idx
+        self.paras[idx] = Paragraph(
             index=idx,
-            text=text.strip(),
+            text=text,
             raw=raw,
-            block_type=current_type
-        ))
-        idx += 1
-        current_block = []
-        current_type = "paragraph"
-
-    for line in lines:
-        stripped = line.strip()
-
-        # Code block toggle
-        if stripped.startswith('```'):
-            if in_code_block:
-                current_block.append(line)
-                in_code_block = False
-                flush()
+            block_type=block_type,
+            html=_render_block(block_type, raw, text)
+        )
+        self.idx = idx + 1
+        block.clear()
+        self.type = "paragraph"
+
+    def feed(self, lines: List[str]) -> None:
+        """Group lines into blocks. The loop keeps its hot state in locals."""
+        block = self.block
+        append = block.append
+        flush = self.flush
+        in_code = self.in_code
+
+        for line in lines:
+            # Offset of the first non-space character; only indented lines
+            # pay for an lstrip() copy
+            start = len(line) - len(line.lstrip()) if line[:1].isspace() else 0
+
+            # Code block toggle
+            if line.startswith('```', start):
+                if in_code:
+                    append(line)
+                    in_code = False
+                    flush()
+                else:
+                    flush()
+                    in_code = True
+                    self.type = "code"
+                    append(line)
+                continue
+
+            if in_code:
+                append(line)
                 continue
-            else:
+
+            # Blank line = block separator
+            if start == len(line):
                 flush()
-                in_code_block = True
-                current_type = "code"
-                current_block.append(line)
                 continue
 
-        if in_code_block:
-            current_block.append(line)
-            continue
-
-        # Blank line = block separator
-        if stripped == '':
-            flush()
-            continue
-
-        # Horizontal rule
-        if re.match(r'^(-{3,}|\*{3,}|_{3,})$', stripped):
-            flush()
-            current_block.append(line)
-            current_type = "hr"
-            flush()
-            continue
-
-        # Heading
-        if re.match(r'^#{1,6}\s', stripped):
-            flush()
-            current_block.append(line)
-            current_type = "heading"
-            flush()
-            continue
-
-        # List item (start of new list or continuation)
-        if re.match(r'^(\s*[-*+]|\s*\d+\.)\s', line):
-            if current_type != "list":
+            # Classify by first character: hr, heading, list item or blockquote
+            first = line[start]
+            classify = _CLASSIFIERS.get(first)
+            if classify is None and first.isdecimal():
+                classify = _classify_ordered
+            kind = classify(line, start) if classify else None
+
+            # Horizontal rule and heading are always single-line blocks
+            if kind == "hr" or kind == "heading":
+                flush()
+                append(line)
+                self.type = kind
                 flush()
-                current_type = "list"
-            current_block.append(line)
-            continue
+                continue
 
-        # Blockquote
-        if stripped.startswith('>'):
-            if current_type != "blockquote":
+            # List item or blockquote line (start of a new block or continuation)
+            if kind is not None:
+                if self.type != kind:
+                    flush()
+                    self.type = kind
+                append(line)
+                continue
+
+            # Regular paragraph text
+            if self.type != "paragraph":
                 flush()
-                current_type = "blockquote"
-            current_block.append(line)
-            continue
+                self.type = "paragraph"
+            append(line)
+
+        self.in_code = in_code
 
-        # Regular paragraph text
-        if current_type not in ("paragraph",):
-            flush()
-        current_block.append(line)
-        current_type = "paragraph"
+
+def parse_markdown_paragraphs(content: str) -> List[Paragraph]:
+    """
+    Parse markdown content into paragraph-level blocks.
+    Groups consecutive lines into logical blocks separated by blank lines.
+    """
+    lines = content.split('\n')
+    parser = _MDParser(len(lines))
+    parser.feed(lines)
 
     # Don't forget remaining content
-    flush()
+    parser.flush()
 
+    paragraphs = parser.paras
+    del paragraphs[parser.idx:]
     return paragraphs
 
 
-def _escape_for_json_in_template(s: str) -> str:
-    """Escape a string for safe embedding in an HTML template's JavaScript."""
-    return json.dumps(s)
+def _json_dumpb(obj: Any) -> bytes:
+    """Compact UTF-8 JSON for embedding in the page; orjson when available.
 
+    Dataclasses such as Paragraph are encoded directly from their fields:
+    orjson handles them natively, and the stdlib fallback reads the
+    instance __dict__ via default=vars instead of building a new dict.
 
-def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph], server_port: int) -> str:
+    Neither encoder escapes '</' or '<!--', so document text containing
+    "</script>" would otherwise end the script block early. Both
+    replacements are valid JSON string escapes.
     """
-    Generate HTML for Phase 1: Comment Collection UI.
+    if orjson is not None:
+        data = orjson.dumps(obj)
+    else:
+        data = json.dumps(
+            obj, ensure_ascii=False, separators=(',', ':'), default=vars
+        ).encode('utf-8')
+    return data.replace(b'</', b'<\\/').replace(b'<!--', b'\\u003c!--')
 
-    Users see the rendered markdown with clickable paragraphs.
-    Clicking a paragraph opens a sidebar form to enter editing instructions.
-    """
-    paragraphs_json = json.dumps([
-        {
-            "index": p.index,
-            "text": p.text,
-            "raw": p.raw,
-            "block_type": p.block_type
-        }
-        for p in paragraphs
-    ], ensure_ascii=False)
 
-    content_json = json.dumps(content, ensure_ascii=False)
+# Encoded paragraph fields other than the index, keyed by the block itself.
+# Across repeated collect_comments calls on an edited document most blocks are
+# unchanged, even when edits above them shift their index, so only new or
+# edited paragraphs are re-encoded. text and html are derived from
+# (block_type, raw), so they do not widen the key in practice.
+@functools.lru_cache(maxsize=4096)
+def _block_json(block_type: str, raw: str, text: str, html: str) -> bytes:
+    """Encode a block's fields as the tail of a JSON object: ',"text":...}'."""
+    data = _json_dumpb({'text': text, 'raw': raw, 'block_type': block_type, 'html': html})
+    return b',' + data[1:]
 
-    return f'''<!DOCTYPE html>
-<html lang="ko">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - Document Editor</title>
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <style>
-        :root {{
+
+def _paragraph_json(p: Paragraph) -> bytes:
+    """Return the JSON record for a paragraph, splicing its index into the cached fields."""
+    return b'{"index":%d' % p.index + _block_json(p.block_type, p.raw, p.text, p.html)
+
+
+_CSS_COMMENTS = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_WHITESPACE = re.compile(r'\s+')
+_CSS_PUNCT_SPACE = re.compile(r'\s*([{}:;,])\s*')
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet (run at import)."""
+    css = _CSS_COMMENTS.sub('', css)
+    css = _CSS_WHITESPACE.sub(' ', css)
+    return _CSS_PUNCT_SPACE.sub(r'\1', css).strip() + '\n'
+
+
+# Stylesheets and scripts shared by every page of a kind, served by the HTTP
+# server under /static/<name> instead of being inlined into each page:
+# name -> (content type, body). Names carry a digest of the body, so the
+# server can mark them immutable.
+STATIC_ASSETS: Dict[str, tuple[str, bytes]] = {}
+
+_STATIC_TYPES = {
+    'css': 'text/css; charset=utf-8',
+    'js': 'text/javascript; charset=utf-8',
+}
+
+
+def _static_asset(stem: str, ext: str, text: str) -> str:
+    """Register a static asset under a content-versioned name and return its URL."""
+    body = text.encode('utf-8')
+    name = f"{stem}.{hashlib.blake2b(body, digest_size=6).hexdigest()}.{ext}"
+    STATIC_ASSETS[name] = (_STATIC_TYPES[ext], body)
+    return '/static/' + name
+
+
+# Stylesheet and script of the comment page, kept as plain (non-f-string)
+# literals so they are built once at import and need no brace escaping. The
+# stylesheet is kept readable here and minified once at import.
+_COMMENT_CSS = _minify_css('''        :root {
             --bg-primary: #0d1117;
             --bg-secondary: #161b22;
             --bg-tertiary: #21262d;
@@ -181,98 +330,98 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             --border: #30363d;
             --highlight-bg: rgba(56, 139, 253, 0.15);
             --comment-indicator: #d29922;
-        }}
+        }
 
-        * {{
+        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
 
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
             background: var(--bg-primary);
             color: var(--text-primary);
             line-height: 1.6;
             min-height: 100vh;
-        }}
+        }
 
-        .layout {{
+        .layout {
             display: flex;
             min-height: 100vh;
-        }}
+        }
 
-        .main-content {{
+        .main-content {
             flex: 1;
             max-width: 900px;
             padding: 2rem;
             overflow-y: auto;
-        }}
+        }
 
-        header {{
+        header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 1.5rem;
             padding-bottom: 1rem;
             border-bottom: 1px solid var(--border);
-        }}
+        }
 
-        header h1 {{
+        header h1 {
             font-size: 1.5rem;
             font-weight: 600;
-        }}
+        }
 
-        .badge {{
+        .badge {
             background: var(--bg-tertiary);
             padding: 0.25rem 0.75rem;
             border-radius: 12px;
             font-size: 0.8rem;
             color: var(--text-secondary);
-        }}
+        }
 
-        .description {{
+        .description {
             font-size: 0.875rem;
             color: var(--text-secondary);
             margin-bottom: 1.5rem;
-        }}
+        }
 
         /* Document paragraphs */
-        .document-container {{
+        .document-container {
             background: var(--bg-secondary);
             border: 1px solid var(--border);
             border-radius: 8px;
             overflow: hidden;
-        }}
+        }
 
-        .paragraph-block {{
+        .paragraph-block {
             padding: 12px 20px;
             border-bottom: 1px solid transparent;
             cursor: pointer;
             position: relative;
             transition: background 0.15s, border-color 0.15s;
-        }}
+        }
 
-        .paragraph-block:hover {{
+        .paragraph-block:hover {
             background: var(--bg-tertiary);
-        }}
+        }
 
-        .paragraph-block.selected {{
+        .paragraph-block.selected {
             background: var(--highlight-bg);
             border-left: 3px solid var(--accent);
             padding-left: 17px;
-        }}
+        }
 
-        .paragraph-block.has-comment {{
+        .paragraph-block.has-comment {
             border-left: 3px solid var(--comment-indicator);
             padding-left: 17px;
-        }}
+        }
 
-        .paragraph-block.has-comment.selected {{
+        .paragraph-block.has-comment.selected {
             border-left: 3px solid var(--accent);
-        }}
+        }
 
-        .paragraph-index {{
+        .paragraph-index {
             position: absolute;
             right: 12px;
             top: 12px;
@@ -283,13 +432,13 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             border-radius: 4px;
             opacity: 0;
             transition: opacity 0.15s;
-        }}
+        }
 
-        .paragraph-block:hover .paragraph-index {{
+        .paragraph-block:hover .paragraph-index {
             opacity: 1;
-        }}
+        }
 
-        .comment-badge {{
+        .comment-badge {
             position: absolute;
             right: 12px;
             top: 50%;
@@ -303,56 +452,56 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             justify-content: center;
             font-size: 12px;
             color: white;
-        }}
+        }
 
         /* Markdown rendered styles inside paragraph blocks */
         .paragraph-block h1,
         .paragraph-block h2,
         .paragraph-block h3,
-        .paragraph-block h4 {{
+        .paragraph-block h4 {
             margin: 0;
             line-height: 1.4;
-        }}
-        .paragraph-block h1 {{ font-size: 1.8em; }}
-        .paragraph-block h2 {{ font-size: 1.4em; }}
-        .paragraph-block h3 {{ font-size: 1.17em; }}
-        .paragraph-block p {{ margin: 0; }}
-        .paragraph-block ul, .paragraph-block ol {{
+        }
+        .paragraph-block h1 { font-size: 1.8em; }
+        .paragraph-block h2 { font-size: 1.4em; }
+        .paragraph-block h3 { font-size: 1.17em; }
+        .paragraph-block p { margin: 0; }
+        .paragraph-block ul, .paragraph-block ol {
             margin: 0;
             padding-left: 1.5em;
-        }}
-        .paragraph-block pre {{
+        }
+        .paragraph-block pre {
             background: var(--bg-tertiary);
             padding: 12px;
             border-radius: 6px;
             overflow-x: auto;
             margin: 0;
-        }}
-        .paragraph-block code {{
+        }
+        .paragraph-block code {
             background: var(--bg-tertiary);
             padding: 0.15em 0.35em;
             border-radius: 4px;
             font-family: 'SF Mono', Monaco, Consolas, monospace;
             font-size: 85%;
-        }}
-        .paragraph-block pre code {{
+        }
+        .paragraph-block pre code {
             background: none;
             padding: 0;
-        }}
-        .paragraph-block blockquote {{
+        }
+        .paragraph-block blockquote {
             border-left: 4px solid var(--border);
             padding-left: 16px;
             color: var(--text-secondary);
             margin: 0;
-        }}
-        .paragraph-block hr {{
+        }
+        .paragraph-block hr {
             border: none;
             border-top: 1px solid var(--border);
             margin: 8px 0;
-        }}
+        }
 
         /* Sidebar */
-        .sidebar {{
+        .sidebar {
             width: 380px;
             background: var(--bg-secondary);
             border-left: 1px solid var(--border);
@@ -361,9 +510,9 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             height: 100vh;
             position: sticky;
             top: 0;
-        }}
+        }
 
-        .sidebar-header {{
+        .sidebar-header {
             padding: 16px 20px;
             border-bottom: 1px solid var(--border);
             font-weight: 600;
@@ -371,24 +520,24 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             display: flex;
             justify-content: space-between;
             align-items: center;
-        }}
+        }
 
-        .sidebar-content {{
+        .sidebar-content {
             flex: 1;
             overflow-y: auto;
             padding: 16px;
-        }}
+        }
 
         /* Comment form */
-        .comment-form {{
+        .comment-form {
             display: none;
-        }}
+        }
 
-        .comment-form.active {{
+        .comment-form.active {
             display: block;
-        }}
+        }
 
-        .selected-text-preview {{
+        .selected-text-preview {
             background: var(--bg-primary);
             border: 1px solid var(--border);
             border-radius: 6px;
@@ -400,18 +549,18 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             overflow-y: auto;
             white-space: pre-wrap;
             font-family: 'SF Mono', Monaco, Consolas, monospace;
-        }}
+        }
 
-        .form-label {{
+        .form-label {
             font-size: 0.75rem;
             font-weight: 600;
             color: var(--text-secondary);
             text-transform: uppercase;
             margin-bottom: 8px;
             display: block;
-        }}
+        }
 
-        .comment-textarea {{
+        .comment-textarea {
             width: 100%;
             min-height: 100px;
             padding: 12px;
@@ -423,33 +572,33 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             resize: vertical;
             font-family: inherit;
             line-height: 1.5;
-        }}
+        }
 
-        .comment-textarea:focus {{
+        .comment-textarea:focus {
             outline: none;
             border-color: var(--accent);
-        }}
+        }
 
-        .comment-textarea::placeholder {{
+        .comment-textarea::placeholder {
             color: var(--text-muted);
-        }}
+        }
 
-        .form-actions {{
+        .form-actions {
             display: flex;
             gap: 8px;
             margin-top: 12px;
-        }}
+        }
 
         /* Comment list */
-        .comment-list {{
+        .comment-list {
             display: none;
-        }}
+        }
 
-        .comment-list.active {{
+        .comment-list.active {
             display: block;
-        }}
+        }
 
-        .comment-item {{
+        .comment-item {
             background: var(--bg-card);
             border: 1px solid var(--border);
             border-radius: 6px;
@@ -457,62 +606,62 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             margin-bottom: 10px;
             cursor: pointer;
             transition: border-color 0.15s;
-        }}
+        }
 
-        .comment-item:hover {{
+        .comment-item:hover {
             border-color: var(--accent);
-        }}
+        }
 
-        .comment-item-header {{
+        .comment-item-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 6px;
-        }}
+        }
 
-        .comment-item-label {{
+        .comment-item-label {
             font-size: 0.75rem;
             font-weight: 600;
             color: var(--accent);
-        }}
+        }
 
-        .comment-item-delete {{
+        .comment-item-delete {
             background: none;
             border: none;
             color: var(--text-muted);
             cursor: pointer;
             font-size: 1rem;
             padding: 0 4px;
-        }}
+        }
 
-        .comment-item-delete:hover {{
+        .comment-item-delete:hover {
             color: var(--danger);
-        }}
+        }
 
-        .comment-item-text {{
+        .comment-item-text {
             font-size: 0.8rem;
             color: var(--text-secondary);
             white-space: nowrap;
             overflow: hidden;
             text-overflow: ellipsis;
             margin-bottom: 4px;
-        }}
+        }
 
-        .comment-item-instruction {{
+        .comment-item-instruction {
             font-size: 0.85rem;
             color: var(--text-primary);
-        }}
+        }
 
-        .empty-state {{
+        .empty-state {
             text-align: center;
             padding: 40px 20px;
             color: var(--text-muted);
             font-size: 0.875rem;
             line-height: 1.8;
-        }}
+        }
 
         /* Buttons */
-        button {{
+        button {
             padding: 0.5rem 1rem;
             border: none;
             border-radius: 6px;
@@ -520,82 +669,82 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             font-weight: 500;
             cursor: pointer;
             transition: all 0.15s;
-        }}
+        }
 
-        .btn-primary {{
+        .btn-primary {
             background: var(--accent);
             color: white;
-        }}
-        .btn-primary:hover {{
+        }
+        .btn-primary:hover {
             background: var(--accent-hover);
-        }}
-        .btn-primary:disabled {{
+        }
+        .btn-primary:disabled {
             opacity: 0.5;
             cursor: not-allowed;
-        }}
+        }
 
-        .btn-secondary {{
+        .btn-secondary {
             background: var(--bg-tertiary);
             color: var(--text-primary);
             border: 1px solid var(--border);
-        }}
-        .btn-secondary:hover {{
+        }
+        .btn-secondary:hover {
             background: var(--border);
-        }}
+        }
 
-        .btn-success {{
+        .btn-success {
             background: var(--success);
             color: white;
-        }}
-        .btn-success:hover {{
+        }
+        .btn-success:hover {
             opacity: 0.9;
-        }}
+        }
 
-        .btn-danger {{
+        .btn-danger {
             background: transparent;
             color: var(--danger);
             border: 1px solid var(--danger);
-        }}
-        .btn-danger:hover {{
+        }
+        .btn-danger:hover {
             background: var(--danger);
             color: white;
-        }}
+        }
 
-        .btn-sm {{
+        .btn-sm {
             padding: 0.3rem 0.6rem;
             font-size: 0.75rem;
-        }}
+        }
 
         /* Bottom action bar */
-        .action-bar {{
+        .action-bar {
             padding: 16px 20px;
             border-top: 1px solid var(--border);
             display: flex;
             justify-content: space-between;
             align-items: center;
-        }}
+        }
 
-        .keyboard-hint {{
+        .keyboard-hint {
             font-size: 0.75rem;
             color: var(--text-muted);
-        }}
+        }
 
-        kbd {{
+        kbd {
             background: var(--bg-tertiary);
             padding: 0.15rem 0.35rem;
             border-radius: 3px;
             font-family: inherit;
             border: 1px solid var(--border);
             font-size: 0.7rem;
-        }}
+        }
 
         /* Tabs */
-        .tabs {{
+        .tabs {
             display: flex;
             border-bottom: 1px solid var(--border);
-        }}
+        }
 
-        .tab {{
+        .tab {
             flex: 1;
             padding: 10px;
             text-align: center;
@@ -606,132 +755,85 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             border-bottom: 2px solid transparent;
             background: none;
             border-radius: 0;
-        }}
+        }
 
-        .tab:hover {{
+        .tab:hover {
             color: var(--text-secondary);
-        }}
+        }
 
-        .tab.active {{
+        .tab.active {
             color: var(--accent);
             border-bottom-color: var(--accent);
-        }}
+        }
 
-        @media (max-width: 900px) {{
-            .layout {{
+        @media (max-width: 900px) {
+            .layout {
                 flex-direction: column;
-            }}
-            .sidebar {{
+            }
+            .sidebar {
                 width: 100%;
                 height: auto;
                 position: static;
                 border-left: none;
                 border-top: 1px solid var(--border);
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="layout">
-        <div class="main-content">
-            <header>
-                <h1>{title}</h1>
-                <span class="badge" id="commentCountBadge">0 comments</span>
-            </header>
-            <p class="description">
-                Click on any paragraph to add an editing instruction. When done, click Submit.
-            </p>
-            <div class="document-container" id="documentContainer"></div>
-
-            <div class="action-bar" style="border-top: none; margin-top: 1rem; padding: 0;">
-                <div class="keyboard-hint">
-                    <kbd>Cmd</kbd>+<kbd>Enter</kbd> submit
-                </div>
-            </div>
-        </div>
-
-        <div class="sidebar">
-            <div class="tabs">
-                <div class="tab active" data-tab="edit" onclick="switchTab('edit')">Edit</div>
-                <div class="tab" data-tab="comments" onclick="switchTab('comments')">Comments (<span id="commentTabCount">0</span>)</div>
-            </div>
-
-            <div class="sidebar-content">
-                <!-- Edit tab: comment form -->
-                <div class="comment-form" id="commentForm">
-                    <label class="form-label">Selected paragraph</label>
-                    <div class="selected-text-preview" id="selectedPreview"></div>
-
-                    <label class="form-label">Editing instruction</label>
-                    <textarea class="comment-textarea" id="commentInput"
-                        placeholder="Enter your editing instruction...&#10;&#10;Examples:&#10;- Make this more concise&#10;- Change tone to formal&#10;- Add more detail about X"></textarea>
-
-                    <div class="form-actions">
-                        <button class="btn-primary" onclick="saveComment()">Save</button>
-                        <button class="btn-secondary" onclick="cancelEdit()">Cancel</button>
-                    </div>
-                </div>
-
-                <!-- Edit tab: empty state -->
-                <div class="empty-state" id="editEmpty">
-                    Click a paragraph on the left<br>to add an editing instruction.
-                </div>
-
-                <!-- Comments tab: list -->
-                <div class="comment-list" id="commentList"></div>
-                <div class="empty-state" id="commentsEmpty" style="display:none;">
-                    No comments yet.
-                </div>
-            </div>
-
-            <div class="action-bar">
-                <button class="btn-secondary" onclick="cancelAll()">Cancel</button>
-                <button class="btn-success" id="submitBtn" onclick="submitComments()" disabled>Submit Comments</button>
-            </div>
-        </div>
-    </div>
+            }
+        }
+''')
 
-    <script>
-        const rawContent = {content_json};
-        const paragraphs = {paragraphs_json};
-        const serverPort = {server_port};
+_COMMENT_JS = '''
+        // Page data, embedded as a JSON block by the server
+        const paragraphs = JSON.parse(document.getElementById('paragraphsData').textContent);
 
         // State
         let selectedIndex = null;
-        let commentMap = {{}};  // paragraph_index -> instruction text
+        let commentMap = {};  // paragraph_index -> instruction text
         let currentTab = 'edit';
 
         // Initialize: render paragraphs
-        function init() {{
+        function init() {
             const container = document.getElementById('documentContainer');
-            container.innerHTML = paragraphs.map(p => {{
-                let html = '';
-                if (p.block_type === 'code') {{
-                    html = '<pre><code>' + escapeHtml(p.text) + '</code></pre>';
-                }} else if (p.block_type === 'hr') {{
-                    html = '<hr>';
-                }} else {{
-                    html = marked.parse(p.raw);
-                }}
-                return `<div class="paragraph-block" data-index="${{p.index}}" onclick="selectParagraph(${{p.index}})">
-                    ${{html}}
-                    <span class="paragraph-index">#${{p.index + 1}}</span>
-                </div>`;
-            }}).join('');
-        }}
+            const proto = document.getElementById('paraTmpl').content.firstElementChild;
+            // Clone the wrapper from the template and only parse the
+            // server-rendered block HTML (p.html); appended in one go
+            const frag = document.createDocumentFragment();
+            for (const p of paragraphs) {
+                const node = proto.cloneNode(true);
+                node.dataset.index = p.index;
+                node.querySelector('.paragraph-index').textContent = '#' + (p.index + 1);
+                node.insertAdjacentHTML('afterbegin', p.html);
+                frag.appendChild(node);
+            }
+            container.appendChild(frag);
+
+            // One delegated listener each for the document and the comment list
+            container.addEventListener('click', (e) => {
+                const el = e.target.closest('.paragraph-block');
+                if (el) selectParagraph(Number(el.dataset.index));
+            });
+            document.getElementById('commentList').addEventListener('click', (e) => {
+                const item = e.target.closest('.comment-item');
+                if (!item) return;
+                const index = Number(item.dataset.index);
+                if (e.target.classList.contains('comment-item-delete')) {
+                    deleteComment(index);
+                } else {
+                    selectParagraph(index);
+                }
+            });
+        }
 
-        function escapeHtml(text) {{
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }}
+        const HTML_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
 
-        function selectParagraph(index) {{
+        function escapeHtml(text) {
+            return String(text).replace(/[&<>"']/g, c => HTML_ESCAPES[c]);
+        }
+
+        function selectParagraph(index) {
             // Deselect previous
             document.querySelectorAll('.paragraph-block.selected').forEach(el => el.classList.remove('selected'));
 
             // Select new
-            const block = document.querySelector(`.paragraph-block[data-index="${{index}}"]`);
+            const block = document.querySelector(`.paragraph-block[data-index="${index}"]`);
             if (block) block.classList.add('selected');
 
             selectedIndex = index;
@@ -748,9 +850,9 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
 
             // Switch to edit tab
             if (currentTab !== 'edit') switchTab('edit');
-        }}
+        }
 
-        function saveComment() {{
+        function saveComment() {
             if (selectedIndex === null) return;
             const text = document.getElementById('commentInput').value.trim();
             if (!text) return;
@@ -758,188 +860,294 @@ def generate_comment_html(title: str, content: str, paragraphs: List[Paragraph],
             commentMap[selectedIndex] = text;
 
             // Update paragraph visual
-            const block = document.querySelector(`.paragraph-block[data-index="${{selectedIndex}}"]`);
-            if (block) {{
+            const block = document.querySelector(`.paragraph-block[data-index="${selectedIndex}"]`);
+            if (block) {
                 block.classList.add('has-comment');
                 // Add/update badge
                 let badge = block.querySelector('.comment-badge');
-                if (!badge) {{
+                if (!badge) {
                     badge = document.createElement('span');
                     badge.className = 'comment-badge';
                     badge.textContent = '!';
                     block.appendChild(badge);
-                }}
-            }}
+                }
+            }
 
             updateCounts();
             cancelEdit();
             renderCommentList();
-        }}
+        }
 
-        function cancelEdit() {{
+        function cancelEdit() {
             selectedIndex = null;
             document.querySelectorAll('.paragraph-block.selected').forEach(el => el.classList.remove('selected'));
             document.getElementById('commentForm').classList.remove('active');
             document.getElementById('editEmpty').style.display = 'block';
-        }}
+        }
 
-        function deleteComment(index) {{
+        function deleteComment(index) {
             delete commentMap[index];
-            const block = document.querySelector(`.paragraph-block[data-index="${{index}}"]`);
-            if (block) {{
+            const block = document.querySelector(`.paragraph-block[data-index="${index}"]`);
+            if (block) {
                 block.classList.remove('has-comment');
                 const badge = block.querySelector('.comment-badge');
                 if (badge) badge.remove();
-            }}
+            }
             updateCounts();
             renderCommentList();
-        }}
+        }
 
-        function updateCounts() {{
+        function updateCounts() {
             const count = Object.keys(commentMap).length;
             document.getElementById('commentCountBadge').textContent = count + ' comment' + (count !== 1 ? 's' : '');
             document.getElementById('commentTabCount').textContent = count;
             document.getElementById('submitBtn').disabled = count === 0;
-        }}
+        }
 
-        function renderCommentList() {{
+        function renderCommentList() {
             const list = document.getElementById('commentList');
             const empty = document.getElementById('commentsEmpty');
             const entries = Object.entries(commentMap).sort((a, b) => Number(a[0]) - Number(b[0]));
 
-            if (entries.length === 0) {{
+            if (entries.length === 0) {
                 list.innerHTML = '';
                 if (currentTab === 'comments') empty.style.display = 'block';
                 return;
-            }}
+            }
 
             empty.style.display = 'none';
-            list.innerHTML = entries.map(([idx, instruction]) => {{
+            list.innerHTML = entries.map(([idx, instruction]) => {
                 const p = paragraphs[Number(idx)];
                 const preview = p.text.substring(0, 60) + (p.text.length > 60 ? '...' : '');
-                return `<div class="comment-item" onclick="selectParagraph(${{idx}})">
+                return `<div class="comment-item" data-index="${idx}">
                     <div class="comment-item-header">
-                        <span class="comment-item-label">Paragraph #${{Number(idx) + 1}}</span>
-                        <button class="comment-item-delete" onclick="event.stopPropagation(); deleteComment(${{idx}})">&times;</button>
+                        <span class="comment-item-label">Paragraph #${Number(idx) + 1}</span>
+                        <button class="comment-item-delete">&times;</button>
                     </div>
-                    <div class="comment-item-text">${{escapeHtml(preview)}}</div>
-                    <div class="comment-item-instruction">${{escapeHtml(instruction)}}</div>
+                    <div class="comment-item-text">${escapeHtml(preview)}</div>
+                    <div class="comment-item-instruction">${escapeHtml(instruction)}</div>
                 </div>`;
-            }}).join('');
-        }}
+            }).join('');
+        }
 
-        function switchTab(tab) {{
+        function switchTab(tab) {
             currentTab = tab;
             document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-            document.querySelector(`.tab[data-tab="${{tab}}"]`).classList.add('active');
+            document.querySelector(`.tab[data-tab="${tab}"]`).classList.add('active');
 
-            if (tab === 'edit') {{
+            if (tab === 'edit') {
                 document.getElementById('commentForm').classList.toggle('active', selectedIndex !== null);
                 document.getElementById('editEmpty').style.display = selectedIndex !== null ? 'none' : 'block';
                 document.getElementById('commentList').classList.remove('active');
                 document.getElementById('commentsEmpty').style.display = 'none';
-            }} else {{
+            } else {
                 document.getElementById('commentForm').classList.remove('active');
                 document.getElementById('editEmpty').style.display = 'none';
                 document.getElementById('commentList').classList.add('active');
                 renderCommentList();
-                if (Object.keys(commentMap).length === 0) {{
+                if (Object.keys(commentMap).length === 0) {
                     document.getElementById('commentsEmpty').style.display = 'block';
-                }}
-            }}
-        }}
+                }
+            }
+        }
 
-        async function submitComments() {{
-            const comments = Object.entries(commentMap).map(([idx, instruction]) => {{
+        async function submitComments() {
+            const comments = Object.entries(commentMap).map(([idx, instruction]) => {
                 const p = paragraphs[Number(idx)];
-                return {{
+                return {
                     paragraph_index: Number(idx),
                     paragraph_text: p.raw,
                     instruction: instruction
-                }};
-            }}).sort((a, b) => a.paragraph_index - b.paragraph_index);
+                };
+            }).sort((a, b) => a.paragraph_index - b.paragraph_index);
 
-            const result = {{
+            const result = {
                 status: 'submitted',
                 comments: comments
-            }};
+            };
 
-            try {{
-                await fetch(`http://localhost:${{serverPort}}/submit`, {{
+            try {
+                await fetch('submit', {
                     method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
+                    headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(result)
-                }});
+                });
                 window.close();
-            }} catch (e) {{
+            } catch (e) {
                 console.error('Submit failed:', e);
-            }}
-        }}
+            }
+        }
 
-        async function cancelAll() {{
-            try {{
-                await fetch(`http://localhost:${{serverPort}}/submit`, {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ status: 'cancelled', comments: [] }})
-                }});
-                window.close();
-            }} catch (e) {{
-                window.close();
-            }}
-        }}
+        function cancelAll() {
+            // Fire-and-forget: the beacon is queued even as the window closes.
+            // A string body goes out as text/plain, which Chromium allows for
+            // beacons (it rejects a JSON-typed Blob); the server ignores the type.
+            const body = JSON.stringify({ status: 'cancelled', comments: [] });
+            try {
+                if (!navigator.sendBeacon('submit', body)) {
+                    fetch('submit', { method: 'POST', body, keepalive: true }).catch(() => {});
+                }
+            } catch (e) {
+                console.error('Cancel failed:', e);
+            }
+            window.close();
+        }
 
         // Keyboard shortcuts
-        document.addEventListener('keydown', (e) => {{
-            if ((e.metaKey || e.ctrlKey) && e.key === 'Enter') {{
+        document.addEventListener('keydown', (e) => {
+            if ((e.metaKey || e.ctrlKey) && e.key === 'Enter') {
                 e.preventDefault();
-                if (!document.getElementById('submitBtn').disabled) {{
+                if (!document.getElementById('submitBtn').disabled) {
                     submitComments();
-                }}
-            }}
-            if (e.key === 'Escape') {{
-                if (selectedIndex !== null) {{
+                }
+            }
+            if (e.key === 'Escape') {
+                if (selectedIndex !== null) {
                     cancelEdit();
-                }}
-            }}
-        }});
+                }
+            }
+        });
 
         // Cmd+Enter in textarea also submits the comment (saves first)
-        document.getElementById('commentInput').addEventListener('keydown', (e) => {{
-            if ((e.metaKey || e.ctrlKey) && e.key === 'Enter') {{
+        document.getElementById('commentInput').addEventListener('keydown', (e) => {
+            if ((e.metaKey || e.ctrlKey) && e.key === 'Enter') {
                 e.preventDefault();
-                if (document.getElementById('commentInput').value.trim()) {{
+                if (document.getElementById('commentInput').value.trim()) {
                     saveComment();
-                }}
-                if (!document.getElementById('submitBtn').disabled) {{
+                }
+                if (!document.getElementById('submitBtn').disabled) {
                     submitComments();
-                }}
-            }}
-        }});
+                }
+            }
+        });
 
         init();
-    </script>
+'''
+
+_COMMENT_CSS_URL = _static_asset('comment', 'css', _COMMENT_CSS)
+_COMMENT_JS_URL = _static_asset('comment', 'js', _COMMENT_JS)
+
+# Static segments of the comment page, built and encoded once at import. The
+# page is emitted as these segments interleaved with the escaped title and
+# the paragraphs JSON (see iter_comment_html). The data sits in a
+# non-executable application/json block that the linked script reads with
+# JSON.parse, so the browser never compiles it as JavaScript.
+_COMMENT_PAGE_START = ('''<!DOCTYPE html>
+<html lang="ko">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>''').encode('utf-8')
+
+_COMMENT_PAGE_AFTER_TITLE = (''' - Document Editor</title>
+    <link rel="stylesheet" href="''' + _COMMENT_CSS_URL + '''">
+</head>
+<body>
+    <div class="layout">
+        <div class="main-content">
+            <header>
+                <h1>''').encode('utf-8')
+
+_COMMENT_PAGE_AFTER_HEADING = ('''</h1>
+                <span class="badge" id="commentCountBadge">0 comments</span>
+            </header>
+            <p class="description">
+                Click on any paragraph to add an editing instruction. When done, click Submit.
+            </p>
+            <div class="document-container" id="documentContainer"></div>
+            <template id="paraTmpl"><div class="paragraph-block"><span class="paragraph-index"></span></div></template>
+
+            <div class="action-bar" style="border-top: none; margin-top: 1rem; padding: 0;">
+                <div class="keyboard-hint">
+                    <kbd>Cmd</kbd>+<kbd>Enter</kbd> submit
+                </div>
+            </div>
+        </div>
+
+        <div class="sidebar">
+            <div class="tabs">
+                <div class="tab active" data-tab="edit" onclick="switchTab('edit')">Edit</div>
+                <div class="tab" data-tab="comments" onclick="switchTab('comments')">Comments (<span id="commentTabCount">0</span>)</div>
+            </div>
+
+            <div class="sidebar-content">
+                <!-- Edit tab: comment form -->
+                <div class="comment-form" id="commentForm">
+                    <label class="form-label">Selected paragraph</label>
+                    <div class="selected-text-preview" id="selectedPreview"></div>
+
+                    <label class="form-label">Editing instruction</label>
+                    <textarea class="comment-textarea" id="commentInput"
+                        placeholder="Enter your editing instruction...&#10;&#10;Examples:&#10;- Make this more concise&#10;- Change tone to formal&#10;- Add more detail about X"></textarea>
+
+                    <div class="form-actions">
+                        <button class="btn-primary" onclick="saveComment()">Save</button>
+                        <button class="btn-secondary" onclick="cancelEdit()">Cancel</button>
+                    </div>
+                </div>
+
+                <!-- Edit tab: empty state -->
+                <div class="empty-state" id="editEmpty">
+                    Click a paragraph on the left<br>to add an editing instruction.
+                </div>
+
+                <!-- Comments tab: list -->
+                <div class="comment-list" id="commentList"></div>
+                <div class="empty-state" id="commentsEmpty" style="display:none;">
+                    No comments yet.
+                </div>
+            </div>
+
+            <div class="action-bar">
+                <button class="btn-secondary" onclick="cancelAll()">Cancel</button>
+                <button class="btn-success" id="submitBtn" onclick="submitComments()" disabled>Submit Comments</button>
+            </div>
+        </div>
+    </div>
+
+    <script id="paragraphsData" type="application/json">''').encode('utf-8')
+
+_COMMENT_PAGE_END = ('''</script>
+    <script src="''' + _COMMENT_JS_URL + '''"></script>
 </body>
-</html>'''
+</html>''').encode('utf-8')
 
 
-def generate_review_html(title: str, changes: list[dict], server_port: int) -> str:
+def iter_comment_html(title: str, paragraphs: List[Paragraph]) -> Iterator[bytes]:
     """
-    Generate HTML for Phase 2: Review Changes UI.
+    Generate HTML for Phase 1: Comment Collection UI, as a sequence of UTF-8 chunks.
 
-    Shows original vs suggested text as diffs.
-    Users can Accept/Reject each change individually or all at once.
+    Users see the rendered markdown with clickable paragraphs.
+    Clicking a paragraph opens a sidebar form to enter editing instructions.
+    Results are posted to the page-relative "submit" URL, so the page does
+    not depend on the server port.
     """
-    changes_json = json.dumps(changes, ensure_ascii=False)
+    paragraphs_json = b'[' + b','.join(_paragraph_json(p) for p in paragraphs) + b']'
 
-    return f'''<!DOCTYPE html>
-<html lang="ko">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - Review Changes</title>
-    <style>
-        :root {{
+    safe_title = escape(title).encode('utf-8')
+
+    yield _COMMENT_PAGE_START
+    yield safe_title
+    yield _COMMENT_PAGE_AFTER_TITLE
+    yield safe_title
+    yield _COMMENT_PAGE_AFTER_HEADING
+    yield paragraphs_json
+    yield _COMMENT_PAGE_END
+
+
+def generate_comment_html_bytes(title: str, paragraphs: List[Paragraph]) -> bytes:
+    """Generate the comment collection page as UTF-8 bytes, ready to serve."""
+    return b''.join(iter_comment_html(title, paragraphs))
+
+
+def generate_comment_html(title: str, paragraphs: List[Paragraph]) -> str:
+    """Generate the comment collection page as a single string."""
+    return generate_comment_html_bytes(title, paragraphs).decode('utf-8')
+
+
+# Stylesheet and script of the review page, plain literals built once at
+# import; only the stylesheet is minified.
+_REVIEW_CSS = _minify_css('''        :root {
             --bg-primary: #0d1117;
             --bg-secondary: #161b22;
             --bg-tertiary: #21262d;
@@ -955,193 +1163,198 @@ def generate_review_html(title: str, changes: list[dict], server_port: int) -> s
             --danger-bg: rgba(248, 81, 73, 0.15);
             --warning: #d29922;
             --border: #30363d;
-        }}
+        }
 
-        * {{
+        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
 
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
             background: var(--bg-primary);
             color: var(--text-primary);
             line-height: 1.6;
             min-height: 100vh;
             padding: 2rem;
-        }}
+        }
 
-        .container {{
+        .container {
             max-width: 900px;
             margin: 0 auto;
-        }}
+        }
 
-        header {{
+        header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 1.5rem;
             padding-bottom: 1rem;
             border-bottom: 1px solid var(--border);
-        }}
+        }
 
-        header h1 {{
+        header h1 {
             font-size: 1.5rem;
             font-weight: 600;
-        }}
+        }
 
-        .summary-badges {{
+        .summary-badges {
             display: flex;
             gap: 8px;
-        }}
+        }
 
-        .badge {{
+        .badge {
             padding: 0.25rem 0.75rem;
             border-radius: 12px;
             font-size: 0.8rem;
-        }}
+        }
 
-        .badge-pending {{
+        .badge-pending {
             background: var(--bg-tertiary);
             color: var(--text-secondary);
-        }}
+        }
 
-        .badge-accepted {{
+        .badge-accepted {
             background: var(--success-bg);
             color: var(--success);
-        }}
+        }
 
-        .badge-rejected {{
+        .badge-rejected {
             background: var(--danger-bg);
             color: var(--danger);
-        }}
+        }
 
-        .bulk-actions {{
+        .bulk-actions {
             display: flex;
             gap: 8px;
             margin-bottom: 1.5rem;
-        }}
+        }
 
         /* Change card */
-        .change-card {{
+        .change-placeholder {
+            height: 240px;
+            margin-bottom: 1rem;
+        }
+
+        .change-card {
             background: var(--bg-secondary);
             border: 1px solid var(--border);
             border-radius: 8px;
             margin-bottom: 1rem;
             overflow: hidden;
             transition: border-color 0.15s;
-        }}
+        }
 
-        .change-card.accepted {{
+        .change-card.accepted {
             border-color: var(--success);
-        }}
+        }
 
-        .change-card.rejected {{
+        .change-card.rejected {
             border-color: var(--danger);
-        }}
+        }
 
-        .change-header {{
+        .change-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             padding: 12px 16px;
             background: var(--bg-tertiary);
             border-bottom: 1px solid var(--border);
-        }}
+        }
 
-        .change-label {{
+        .change-label {
             font-size: 0.85rem;
             font-weight: 600;
-        }}
+        }
 
-        .change-instruction {{
+        .change-instruction {
             font-size: 0.8rem;
             color: var(--text-secondary);
             padding: 8px 16px;
             border-bottom: 1px solid var(--border);
             font-style: italic;
-        }}
+        }
 
-        .change-status {{
+        .change-status {
             font-size: 0.75rem;
             padding: 2px 8px;
             border-radius: 4px;
             font-weight: 600;
-        }}
+        }
 
-        .status-pending {{
+        .status-pending {
             background: var(--bg-primary);
             color: var(--text-muted);
-        }}
+        }
 
-        .status-accepted {{
+        .status-accepted {
             background: var(--success-bg);
             color: var(--success);
-        }}
+        }
 
-        .status-rejected {{
+        .status-rejected {
             background: var(--danger-bg);
             color: var(--danger);
-        }}
+        }
 
-        .diff-container {{
+        .diff-container {
             padding: 16px;
-        }}
+        }
 
-        .diff-section {{
+        .diff-section {
             margin-bottom: 12px;
-        }}
+        }
 
-        .diff-section:last-child {{
+        .diff-section:last-child {
             margin-bottom: 0;
-        }}
+        }
 
-        .diff-label {{
+        .diff-label {
             font-size: 0.7rem;
             font-weight: 600;
             text-transform: uppercase;
             margin-bottom: 4px;
             display: block;
-        }}
+        }
 
-        .diff-label.original {{
+        .diff-label.original {
             color: var(--danger);
-        }}
+        }
 
-        .diff-label.suggested {{
+        .diff-label.suggested {
             color: var(--success);
-        }}
+        }
 
-        .diff-text {{
+        .diff-text {
             padding: 10px 14px;
             border-radius: 6px;
             font-size: 0.875rem;
             line-height: 1.6;
             white-space: pre-wrap;
             word-wrap: break-word;
-        }}
+        }
 
-        .diff-text.original {{
+        .diff-text.original {
             background: var(--danger-bg);
             border-left: 3px solid var(--danger);
-        }}
+        }
 
-        .diff-text.suggested {{
+        .diff-text.suggested {
             background: var(--success-bg);
             border-left: 3px solid var(--success);
-        }}
+        }
 
-        .change-actions {{
+        .change-actions {
             display: flex;
             gap: 8px;
             padding: 12px 16px;
             border-top: 1px solid var(--border);
             justify-content: flex-end;
-        }}
+        }
 
         /* Buttons */
-        button {{
+        button {
             padding: 0.5rem 1rem;
             border: none;
             border-radius: 6px;
@@ -1149,101 +1362,334 @@ def generate_review_html(title: str, changes: list[dict], server_port: int) -> s
             font-weight: 500;
             cursor: pointer;
             transition: all 0.15s;
-        }}
+        }
 
-        .btn-primary {{
+        .btn-primary {
             background: var(--accent);
             color: white;
-        }}
-        .btn-primary:hover {{
+        }
+        .btn-primary:hover {
             background: var(--accent-hover);
-        }}
-        .btn-primary:disabled {{
+        }
+        .btn-primary:disabled {
             opacity: 0.5;
             cursor: not-allowed;
-        }}
+        }
 
-        .btn-secondary {{
+        .btn-secondary {
             background: var(--bg-tertiary);
             color: var(--text-primary);
             border: 1px solid var(--border);
-        }}
-        .btn-secondary:hover {{
+        }
+        .btn-secondary:hover {
             background: var(--border);
-        }}
+        }
 
-        .btn-success {{
+        .btn-success {
             background: var(--success);
             color: white;
-        }}
-        .btn-success:hover {{
+        }
+        .btn-success:hover {
             opacity: 0.9;
-        }}
+        }
 
-        .btn-danger {{
+        .btn-danger {
             background: transparent;
             color: var(--danger);
             border: 1px solid var(--danger);
-        }}
-        .btn-danger:hover {{
+        }
+        .btn-danger:hover {
             background: var(--danger);
             color: white;
-        }}
+        }
 
-        .btn-sm {{
+        .btn-sm {
             padding: 0.3rem 0.6rem;
             font-size: 0.75rem;
-        }}
+        }
 
-        .btn-outline-success {{
+        .btn-outline-success {
             background: transparent;
             color: var(--success);
             border: 1px solid var(--success);
-        }}
-        .btn-outline-success:hover {{
+        }
+        .btn-outline-success:hover {
             background: var(--success);
             color: white;
-        }}
+        }
 
-        .btn-outline-danger {{
+        .btn-outline-danger {
             background: transparent;
             color: var(--danger);
             border: 1px solid var(--danger);
-        }}
-        .btn-outline-danger:hover {{
+        }
+        .btn-outline-danger:hover {
             background: var(--danger);
             color: white;
-        }}
+        }
 
         /* Bottom bar */
-        .bottom-bar {{
+        .bottom-bar {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-top: 1.5rem;
             padding-top: 1rem;
             border-top: 1px solid var(--border);
-        }}
+        }
 
-        .keyboard-hint {{
+        .keyboard-hint {
             font-size: 0.75rem;
             color: var(--text-muted);
-        }}
+        }
 
-        kbd {{
+        kbd {
             background: var(--bg-tertiary);
             padding: 0.15rem 0.35rem;
             border-radius: 3px;
             font-family: inherit;
             border: 1px solid var(--border);
             font-size: 0.7rem;
-        }}
-    </style>
+        }
+''')
+
+_REVIEW_JS = '''
+        // Page data, embedded as a JSON block by the server
+        const changes = JSON.parse(document.getElementById('changesData').textContent);
+
+        // Status codes; the data-a attributes in the markup use the names
+        const PENDING = 0, ACCEPTED = 1, REJECTED = 2;
+        const STATUS_CODE = Object.freeze({ pending: PENDING, accepted: ACCEPTED, rejected: REJECTED });
+
+        // State: one status code per change, all pending to start
+        const decisions = new Uint8Array(changes.length);
+        // Running totals indexed by status code, kept in step with decisions
+        const counts = [decisions.length, 0, 0];
+
+        // Class names and labels indexed by status code
+        const CARD_CLASS = Object.freeze([
+            'change-card pending', 'change-card accepted', 'change-card rejected'
+        ]);
+        const STATUS_CLASS = Object.freeze([
+            'change-status status-pending', 'change-status status-accepted', 'change-status status-rejected'
+        ]);
+        const STATUS_TEXT = Object.freeze(['PENDING', 'ACCEPTED', 'REJECTED']);
+        const ACCEPT_BTN_CLASS = Object.freeze([
+            'btn-sm btn-outline-success', 'btn-sm btn-success', 'btn-sm btn-outline-success'
+        ]);
+        const REJECT_BTN_CLASS = Object.freeze([
+            'btn-sm btn-outline-danger', 'btn-sm btn-outline-danger', 'btn-sm btn-danger'
+        ]);
+
+        // Per-card elements, captured as each card is built so decisions
+        // update the affected card in place instead of rebuilding the list.
+        // Cards that are not built yet have no entry.
+        const cardEls = [];
+        const statusEls = [];
+        const acceptBtns = [];
+        const rejectBtns = [];
+
+        // Cards built up front; the rest start as placeholders and are
+        // built when they scroll near the viewport
+        const EAGER_CARDS = 20;
+
+        const cardProto = document.getElementById('cardTpl').content.firstElementChild;
+
+        // Clone a card from the template and fill it in with textContent, so
+        // change text never goes through the HTML parser or needs escaping
+        function buildCard(i) {
+            const change = changes[i];
+            const card = cardProto.cloneNode(true);
+            card.id = 'card-' + i;
+            card.querySelector('.change-label').textContent = 'Paragraph #' + (change.paragraph_index + 1);
+            card.querySelector('.change-instruction').textContent = change.instruction;
+            card.querySelector('.diff-text.original').textContent = change.original;
+            card.querySelector('.diff-text.suggested').textContent = change.suggested;
+
+            const [acceptBtn, rejectBtn] = card.querySelectorAll('.change-actions button');
+            acceptBtn.dataset.i = i;
+            rejectBtn.dataset.i = i;
+
+            cardEls[i] = card;
+            statusEls[i] = card.querySelector('.change-status');
+            acceptBtns[i] = acceptBtn;
+            rejectBtns[i] = rejectBtn;
+            updateCard(i);
+            return card;
+        }
+
+        // Replace a placeholder with the real card
+        function hydrate(slot) {
+            slot.replaceWith(buildCard(Number(slot.dataset.i)));
+        }
+
+        const cardObserver = new IntersectionObserver((entries) => {
+            for (const entry of entries) {
+                if (entry.isIntersecting) {
+                    cardObserver.unobserve(entry.target);
+                    hydrate(entry.target);
+                }
+            }
+        }, { rootMargin: '400px' });
+
+        function renderChanges() {
+            const frag = document.createDocumentFragment();
+            for (let i = 0; i < changes.length; i++) {
+                if (i < EAGER_CARDS) {
+                    frag.appendChild(buildCard(i));
+                } else {
+                    const slot = document.createElement('div');
+                    slot.className = 'change-placeholder';
+                    slot.dataset.i = i;
+                    cardObserver.observe(slot);
+                    frag.appendChild(slot);
+                }
+            }
+            document.getElementById('changesList').appendChild(frag);
+
+            updateBadges();
+        }
+
+        function updateCard(i) {
+            // Unbuilt cards pick up their decision when they are hydrated
+            if (!cardEls[i]) return;
+            const status = decisions[i];
+            cardEls[i].className = CARD_CLASS[status];
+            statusEls[i].className = STATUS_CLASS[status];
+            statusEls[i].textContent = STATUS_TEXT[status];
+            acceptBtns[i].className = ACCEPT_BTN_CLASS[status];
+            rejectBtns[i].className = REJECT_BTN_CLASS[status];
+        }
+
+        // Cards whose decision changed since the last frame. State is
+        // updated immediately; the DOM is written at most once per frame,
+        // however many clicks or bulk actions land before it.
+        const dirtyCards = new Set();
+        let flushPending = false;
+
+        function scheduleFlush() {
+            if (flushPending) return;
+            flushPending = true;
+            requestAnimationFrame(() => {
+                flushPending = false;
+                for (const i of dirtyCards) updateCard(i);
+                dirtyCards.clear();
+                updateBadges();
+            });
+        }
+
+        function applyDecision(i, status) {
+            counts[decisions[i]]--;
+            counts[status]++;
+            decisions[i] = status;
+            dirtyCards.add(i);
+        }
+
+        function setDecision(index, status) {
+            applyDecision(index, decisions[index] === status ? PENDING : status);
+            scheduleFlush();
+        }
+
+        function setAll(status) {
+            decisions.fill(status);
+            counts.fill(0);
+            counts[status] = decisions.length;
+            // Only built cards need a DOM update; forEach skips the holes
+            cardEls.forEach((_, i) => dirtyCards.add(i));
+            scheduleFlush();
+        }
+
+        function updateBadges() {
+            document.getElementById('pendingBadge').textContent = `${counts[PENDING]} pending`;
+            document.getElementById('acceptedBadge').textContent = `${counts[ACCEPTED]} accepted`;
+            document.getElementById('rejectedBadge').textContent = `${counts[REJECTED]} rejected`;
+        }
+
+        async function submitReview() {
+            // One entry per change, in order; the server fills in the
+            // original/suggested text it already holds
+            const result = {
+                status: 'submitted',
+                decisions: changes.map((c, i) => ({
+                    paragraph_index: c.paragraph_index,
+                    accepted: decisions[i] === ACCEPTED
+                }))
+            };
+
+            try {
+                await fetch('submit', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(result)
+                });
+                window.close();
+            } catch (e) {
+                console.error('Submit failed:', e);
+            }
+        }
+
+        function cancelReview() {
+            // Fire-and-forget: the beacon is queued even as the window closes.
+            // A string body goes out as text/plain, which Chromium allows for
+            // beacons (it rejects a JSON-typed Blob); the server ignores the type.
+            const body = JSON.stringify({ status: 'cancelled', decisions: [] });
+            try {
+                if (!navigator.sendBeacon('submit', body)) {
+                    fetch('submit', { method: 'POST', body, keepalive: true }).catch(() => {});
+                }
+            } catch (e) {
+                console.error('Cancel failed:', e);
+            }
+            window.close();
+        }
+
+        // Keyboard shortcuts
+        document.addEventListener('keydown', (e) => {
+            if ((e.metaKey || e.ctrlKey) && e.key === 'Enter') {
+                e.preventDefault();
+                submitReview();
+            }
+            if (e.key === 'Escape') {
+                cancelReview();
+            }
+        });
+
+        renderChanges();
+
+        // One delegated listener each for the card buttons and the bulk actions
+        document.getElementById('changesList').addEventListener('click', (e) => {
+            const btn = e.target.closest('button[data-i]');
+            if (btn) setDecision(Number(btn.dataset.i), STATUS_CODE[btn.dataset.a]);
+        });
+        document.querySelector('.bulk-actions').addEventListener('click', (e) => {
+            const btn = e.target.closest('button[data-a]');
+            if (btn) setAll(STATUS_CODE[btn.dataset.a]);
+        });
+'''
+
+_REVIEW_CSS_URL = _static_asset('review', 'css', _REVIEW_CSS)
+_REVIEW_JS_URL = _static_asset('review', 'js', _REVIEW_JS)
+
+# Static segments of the review page, built and encoded once at import. The
+# page is these segments interleaved with the escaped title and the changes
+# JSON (see iter_review_html), with the stylesheet and script linked. The
+# changes sit in an application/json block the script reads with JSON.parse.
+_REVIEW_PAGE_START = ('''<!DOCTYPE html>
+<html lang="ko">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>''').encode('utf-8')
+
+_REVIEW_PAGE_AFTER_TITLE = (''' - Review Changes</title>
+    <link rel="stylesheet" href="''' + _REVIEW_CSS_URL + '''">
 </head>
 <body>
     <div class="container">
         <header>
-            <h1>{title}</h1>
+            <h1>''').encode('utf-8')
+
+_REVIEW_PAGE_AFTER_HEADING = ('''</h1>
             <div class="summary-badges">
                 <span class="badge badge-pending" id="pendingBadge">0 pending</span>
                 <span class="badge badge-accepted" id="acceptedBadge">0 accepted</span>
@@ -1252,12 +1698,35 @@ def generate_review_html(title: str, changes: list[dict], server_port: int) -> s
         </header>
 
         <div class="bulk-actions">
-            <button class="btn-outline-success btn-sm" onclick="acceptAll()">Accept All</button>
-            <button class="btn-outline-danger btn-sm" onclick="rejectAll()">Reject All</button>
-            <button class="btn-secondary btn-sm" onclick="resetAll()">Reset All</button>
+            <button class="btn-outline-success btn-sm" data-a="accepted">Accept All</button>
+            <button class="btn-outline-danger btn-sm" data-a="rejected">Reject All</button>
+            <button class="btn-secondary btn-sm" data-a="pending">Reset All</button>
         </div>
 
         <div id="changesList"></div>
+        <template id="cardTpl">
+            <div class="change-card">
+                <div class="change-header">
+                    <span class="change-label"></span>
+                    <span class="change-status"></span>
+                </div>
+                <div class="change-instruction"></div>
+                <div class="diff-container">
+                    <div class="diff-section">
+                        <span class="diff-label original">Original</span>
+                        <div class="diff-text original"></div>
+                    </div>
+                    <div class="diff-section">
+                        <span class="diff-label suggested">Suggested</span>
+                        <div class="diff-text suggested"></div>
+                    </div>
+                </div>
+                <div class="change-actions">
+                    <button data-a="accepted">Accept</button>
+                    <button data-a="rejected">Reject</button>
+                </div>
+            </div>
+        </template>
 
         <div class="bottom-bar">
             <div class="keyboard-hint">
@@ -1270,129 +1739,52 @@ def generate_review_html(title: str, changes: list[dict], server_port: int) -> s
         </div>
     </div>
 
-    <script>
-        const changes = {changes_json};
-        const serverPort = {server_port};
-
-        // State: 'pending' | 'accepted' | 'rejected'
-        let decisions = changes.map(() => 'pending');
-
-        function escapeHtml(text) {{
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }}
-
-        function renderChanges() {{
-            const container = document.getElementById('changesList');
-            container.innerHTML = changes.map((change, i) => {{
-                const status = decisions[i];
-                return `<div class="change-card ${{status}}" id="card-${{i}}">
-                    <div class="change-header">
-                        <span class="change-label">Paragraph #${{change.paragraph_index + 1}}</span>
-                        <span class="change-status status-${{status}}">${{status.toUpperCase()}}</span>
-                    </div>
-                    <div class="change-instruction">${{escapeHtml(change.instruction)}}</div>
-                    <div class="diff-container">
-                        <div class="diff-section">
-                            <span class="diff-label original">Original</span>
-                            <div class="diff-text original">${{escapeHtml(change.original)}}</div>
-                        </div>
-                        <div class="diff-section">
-                            <span class="diff-label suggested">Suggested</span>
-                            <div class="diff-text suggested">${{escapeHtml(change.suggested)}}</div>
-                        </div>
-                    </div>
-                    <div class="change-actions">
-                        <button class="btn-sm ${{status === 'accepted' ? 'btn-success' : 'btn-outline-success'}}"
-                                onclick="setDecision(${{i}}, 'accepted')">Accept</button>
-                        <button class="btn-sm ${{status === 'rejected' ? 'btn-danger' : 'btn-outline-danger'}}"
-                                onclick="setDecision(${{i}}, 'rejected')">Reject</button>
-                    </div>
-                </div>`;
-            }}).join('');
+    <script id="changesData" type="application/json">''').encode('utf-8')
 
-            updateBadges();
-        }}
-
-        function setDecision(index, status) {{
-            decisions[index] = decisions[index] === status ? 'pending' : status;
-            renderChanges();
-        }}
-
-        function acceptAll() {{
-            decisions = decisions.map(() => 'accepted');
-            renderChanges();
-        }}
-
-        function rejectAll() {{
-            decisions = decisions.map(() => 'rejected');
-            renderChanges();
-        }}
-
-        function resetAll() {{
-            decisions = decisions.map(() => 'pending');
-            renderChanges();
-        }}
-
-        function updateBadges() {{
-            const pending = decisions.filter(d => d === 'pending').length;
-            const accepted = decisions.filter(d => d === 'accepted').length;
-            const rejected = decisions.filter(d => d === 'rejected').length;
-
-            document.getElementById('pendingBadge').textContent = `${{pending}} pending`;
-            document.getElementById('acceptedBadge').textContent = `${{accepted}} accepted`;
-            document.getElementById('rejectedBadge').textContent = `${{rejected}} rejected`;
-        }}
-
-        async function submitReview() {{
-            const result = {{
-                status: 'submitted',
-                decisions: changes.map((change, i) => ({{
-                    paragraph_index: change.paragraph_index,
-                    original: change.original,
-                    suggested: change.suggested,
-                    accepted: decisions[i] === 'accepted'
-                }}))
-            }};
-
-            try {{
-                await fetch(`http://localhost:${{serverPort}}/submit`, {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify(result)
-                }});
-                window.close();
-            }} catch (e) {{
-                console.error('Submit failed:', e);
-            }}
-        }}
+_REVIEW_PAGE_END = ('''</script>
+    <script src="''' + _REVIEW_JS_URL + '''"></script>
+</body>
+</html>''').encode('utf-8')
 
-        async function cancelReview() {{
-            try {{
-                await fetch(`http://localhost:${{serverPort}}/submit`, {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ status: 'cancelled', decisions: [] }})
-                }});
-                window.close();
-            }} catch (e) {{
-                window.close();
-            }}
-        }}
 
-        // Keyboard shortcuts
-        document.addEventListener('keydown', (e) => {{
-            if ((e.metaKey || e.ctrlKey) && e.key === 'Enter') {{
-                e.preventDefault();
-                submitReview();
-            }}
-            if (e.key === 'Escape') {{
-                cancelReview();
-            }}
-        }});
+@functools.lru_cache(maxsize=512)
+def _change_json(paragraph_index: int, original: str, suggested: str, instruction: str) -> bytes:
+    """Compact JSON record for one review change, memoized across reviews."""
+    return _json_dumpb({
+        "paragraph_index": paragraph_index,
+        "original": original,
+        "suggested": suggested,
+        "instruction": instruction,
+    })
 
-        renderChanges();
-    </script>
-</body>
-</html>'''
+
+def iter_review_html(title: str, changes: list[dict]) -> Iterator[bytes]:
+    """
+    Generate HTML for Phase 2: Review Changes UI, as a sequence of UTF-8 chunks.
+
+    Shows original vs suggested text as diffs.
+    Users can Accept/Reject each change individually or all at once.
+    """
+    changes_json = b'[' + b','.join(
+        _change_json(c.get('paragraph_index'), c.get('original'), c.get('suggested'), c.get('instruction'))
+        for c in changes
+    ) + b']'
+    safe_title = escape(title).encode('utf-8')
+
+    yield _REVIEW_PAGE_START
+    yield safe_title
+    yield _REVIEW_PAGE_AFTER_TITLE
+    yield safe_title
+    yield _REVIEW_PAGE_AFTER_HEADING
+    yield changes_json
+    yield _REVIEW_PAGE_END
+
+
+def generate_review_html_bytes(title: str, changes: list[dict]) -> bytes:
+    """Generate the review page as UTF-8 bytes, ready to serve."""
+    return b''.join(iter_review_html(title, changes))
+
+
+def generate_review_html(title: str, changes: list[dict]) -> str:
+    """Generate the review page as a single string."""
+    return generate_review_html_bytes(title, changes).decode('utf-8')